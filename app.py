@@ -4,15 +4,27 @@ ChemVista - Fresh Clean Chemistry Web Application
 A modern, responsive chemistry explorer with complete periodic table and compound database
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
+import hashlib
 import json
 import os
 from functools import lru_cache
 import re
 from datetime import datetime
 
+import assets
+import batch
+import compound_store
+import config
+import formula_solver
+import isotopes
+import json_fragments
+import shared_cache
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'chemvista-fresh-2025'
+assets.init_app(app)
+batch.init_app(app, max_requests=config.BATCH_MAX_REQUESTS, max_workers=config.BATCH_MAX_WORKERS)
 
 # Chemistry constants and data
 FAMOUS_CHEMISTS = [
@@ -391,14 +403,101 @@ def load_compounds():
         {"formula": "ThO2", "name": "Thorium Dioxide", "molecular_weight": 264.037, "category": "ionic", "description": "Nuclear fuel precursor", "uses": ["Nuclear fuel"], "state": "solid", "common_name": "Thorium dioxide", "hazards": ["Radioactive"]},
     ]
 
+@lru_cache(maxsize=1)
+def get_compound_store():
+    """Compound store selected by configuration (in-memory list or SQLite FTS5)"""
+    return compound_store.create_store(
+        config.COMPOUND_STORE_BACKEND,
+        load_compounds,
+        path=config.COMPOUND_STORE_PATH,
+        pool_size=config.COMPOUND_STORE_POOL_SIZE,
+    )
+
+def catalog_version():
+    """Fingerprint of the chemistry data, templates and code, used to key shared caches
+
+    The code is identified by CHEMVISTA_DEPLOY_ID when set, otherwise by a hash
+    of the app's Python sources, so a deploy never serves pages cached by the
+    previous release.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(load_elements(), sort_keys=True).encode('utf-8'))
+    digest.update(get_compound_store().version().encode('utf-8'))
+    templates_dir = os.path.join(app.root_path, app.template_folder)
+    sources = [os.path.join(templates_dir, name) for name in sorted(os.listdir(templates_dir))]
+    if config.DEPLOY_ID:
+        digest.update(config.DEPLOY_ID.encode('utf-8'))
+    else:
+        sources += [os.path.join(app.root_path, name) for name in sorted(os.listdir(app.root_path))
+                    if name.endswith('.py')]
+    for path in sources:
+        with open(path, 'rb') as f:
+            digest.update(os.path.basename(path).encode('utf-8'))
+            digest.update(f.read())
+    return f"{config.APP_VERSION}-{digest.hexdigest()[:16]}"
+
+# Cache shared by all workers for rendered pages, API payloads and formula results
+cache = shared_cache.SharedCache(
+    shared_cache.create_backend(
+        config.SHARED_CACHE_BACKEND,
+        path=config.SHARED_CACHE_PATH,
+        max_bytes=config.SHARED_CACHE_MAX_BYTES,
+        redis_url=config.SHARED_CACHE_REDIS_URL,
+    ),
+    version=catalog_version(),
+)
+
+# Pre-encoded JSON projections returned by the search APIs; compound fragments
+# are keyed by the store's record id, since formula and name are not unique
+autocomplete_fragments = json_fragments.FragmentEncoder(
+    lambda compound: {
+        'formula': compound['formula'],
+        'name': compound['name'],
+        'molecular_weight': compound.get('molecular_weight', 0)
+    },
+)
+
+element_search_fragments = json_fragments.FragmentEncoder(
+    lambda element: {
+        'type': 'element',
+        'symbol': element['symbol'],
+        'name': element['name'],
+        'number': element['number'],
+        'atomic_mass': element['atomic_mass'],
+        'category': element['category'],
+        'period': element.get('period'),
+        'description': element.get('description', '')
+    },
+    key=lambda element: element['number'],
+)
+
+compound_search_fragments = json_fragments.FragmentEncoder(
+    lambda compound: {
+        'type': 'compound',
+        'formula': compound['formula'],
+        'name': compound['name'],
+        'molecular_weight': compound.get('molecular_weight', 0),
+        'category': compound.get('category', ''),
+        'state': compound.get('state', ''),
+        'description': compound.get('description', ''),
+        'uses': compound.get('uses', []),
+        'common_name': compound.get('common_name', '')
+    },
+)
+
 # Routes
+# Every GET page and API response that depends only on the request URL and the
+# catalog is cached (see catalog_version); only random or POST-driven responses
+# are not
 @app.route('/')
+@cache.cached_view('page')
 def index():
     """Homepage with complete periodic table"""
     elements = load_elements()
     return render_template('index.html', elements=elements)
 
 @app.route('/element/<int:number>')
+@cache.cached_view('page')
 def element_detail(number):
     """Element detail page"""
     elements = load_elements()
@@ -408,19 +507,17 @@ def element_detail(number):
     return render_template('element_detail.html', element=element)
 
 @app.route('/search')
+@cache.cached_view('page')
 def search():
     """Advanced search page"""
     query = request.args.get('q', '')
-    compounds = load_compounds()
     elements = load_elements()
     
     results = []
     if query:
         # Search compounds
-        for compound in compounds:
-            if (query.lower() in compound['name'].lower() or 
-                query.lower() in compound['formula'].lower()):
-                results.append({'type': 'compound', 'data': compound})
+        for compound in get_compound_store().search(query, fields=('name', 'formula')):
+            results.append({'type': 'compound', 'data': compound})
         
         # Search elements
         for element in elements:
@@ -431,35 +528,40 @@ def search():
     return render_template('search.html', query=query, results=results)
 
 @app.route('/compound/<formula>')
+@cache.cached_view('page')
 def compound_detail(formula):
     """Compound detail page"""
-    compounds = load_compounds()
-    compound = next((c for c in compounds if c['formula'] == formula), None)
+    compound = get_compound_store().get(formula)
     if not compound:
         return render_template('error.html', error_code=404), 404
     return render_template('compound_detail.html', compound=compound)
 
 @app.route('/formula-finder')
+@cache.cached_view('page')
 def formula_finder():
     """Advanced chemical formula finder and calculator"""
     return render_template('formula_finder.html')
 
 @app.route('/about')
+@cache.cached_view('page')
 def about():
     """About ChemVista page"""
     return render_template('about.html')
 
 @app.route('/use-cases')
+@cache.cached_view('page')
 def use_cases():
     """Use cases and applications page"""
     return render_template('use_cases.html')
 
 @app.route('/scientists')
+@cache.cached_view('page')
 def scientists():
     """Famous chemists and scientists page"""
     return render_template('scientists.html', scientists=FAMOUS_CHEMISTS)
 
 @app.route('/scientist/<name>')
+@cache.cached_view('page')
 def scientist_detail(name):
     """Individual scientist detail page"""
     scientist = next((s for s in FAMOUS_CHEMISTS if s['name'].replace(' ', '-').lower() == name.lower()), None)
@@ -468,16 +570,19 @@ def scientist_detail(name):
     return render_template('scientist_detail.html', scientist=scientist)
 
 @app.route('/periodic-table-info')
+@cache.cached_view('page')
 def periodic_table_info():
     """Comprehensive periodic table information"""
     return render_template('periodic_table_info.html')
 
 @app.route('/chemistry-concepts')
+@cache.cached_view('page')
 def chemistry_concepts():
     """Chemistry concepts and theories"""
     return render_template('chemistry_concepts.html', concepts=CHEMISTRY_CONCEPTS)
 
 @app.route('/concept/<concept_title>')
+@cache.cached_view('page')
 def concept_detail(concept_title):
     """Individual chemistry concept detail page"""
     concept = next((c for c in CHEMISTRY_CONCEPTS if c['title'].replace(' ', '-').lower() == concept_title.lower()), None)
@@ -486,27 +591,32 @@ def concept_detail(concept_title):
     return render_template('concept_detail.html', concept=concept)
 
 @app.route('/resources')
+@cache.cached_view('page')
 def resources():
     """Educational resources and reference links"""
     return render_template('resources.html')
 
 @app.route('/calculator')
+@cache.cached_view('page')
 def calculator():
     """Chemistry calculator and tools"""
     formula = request.args.get('formula', '')
     return render_template('calculator.html', formula=formula)
 
 @app.route('/quiz')
+@cache.cached_view('page')
 def quiz():
     """Interactive chemistry quiz"""
     return render_template('quiz.html')
 
 @app.route('/lab-safety')
+@cache.cached_view('page')
 def lab_safety():
     """Laboratory safety guidelines"""
     return render_template('lab_safety.html')
 
 @app.route('/api/search')
+@cache.cached_view('api')
 def api_search():
     """Search API for autocomplete"""
     query = request.args.get('q', '').strip()
@@ -515,34 +625,44 @@ def api_search():
     if not query:
         return jsonify([])
     
-    compounds = load_compounds()
-    results = []
+    results = get_compound_store().search_keyed(query, limit, fields=('formula', 'name'))
     
-    query_lower = query.lower()
-    for compound in compounds:
-        if (query_lower in compound['formula'].lower() or 
-            query_lower in compound['name'].lower()):
-            results.append({
-                'formula': compound['formula'],
-                'name': compound['name'],
-                'molecular_weight': compound.get('molecular_weight', 0)
-            })
-            if len(results) >= limit:
-                break
-    
-    return jsonify(results)
+    return json_fragments.keyed_array_response(autocomplete_fragments, results)
 
 @app.route('/api/elements')
+@cache.cached_view('api')
 def api_elements():
     """Get all elements"""
     return jsonify(load_elements())
 
 @app.route('/api/compounds')
+@cache.cached_view('api')
 def api_compounds():
-    """Get all compounds"""
-    return jsonify(load_compounds())
+    """Get all compounds (optionally paginated with offset/limit)"""
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = request.args.get('limit')
+        limit = int(limit) if limit is not None else None
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be non-negative integers'}), 400
+    
+    store = get_compound_store()
+    if isinstance(store, compound_store.MemoryCompoundStore):
+        return jsonify(list(store.iter_all(offset, limit)))
+    
+    # Large catalogs are streamed so the response never sits in memory whole
+    def generate():
+        yield '['
+        for i, compound in enumerate(store.iter_all(offset, limit)):
+            yield (',' if i else '') + json.dumps(compound)
+        yield ']'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 @app.route('/api/element/search')
+@cache.cached_view('api')
 def api_element_search():
     """Search elements API"""
     query = request.args.get('q', '').strip()
@@ -559,22 +679,14 @@ def api_element_search():
         if (query_lower in element['symbol'].lower() or 
             query_lower in element['name'].lower() or
             str(element['number']) == query):
-            results.append({
-                'type': 'element',
-                'symbol': element['symbol'],
-                'name': element['name'],
-                'number': element['number'],
-                'atomic_mass': element['atomic_mass'],
-                'category': element['category'],
-                'period': element.get('period'),
-                'description': element.get('description', '')
-            })
+            results.append(element)
             if len(results) >= limit:
                 break
     
-    return jsonify(results)
+    return json_fragments.array_response(element_search_fragments, results)
 
 @app.route('/api/compound/search')
+@cache.cached_view('api')
 def api_compound_search():
     """Search compounds API"""
     query = request.args.get('q', '').strip()
@@ -583,29 +695,9 @@ def api_compound_search():
     if not query:
         return jsonify([])
     
-    compounds = load_compounds()
-    results = []
-    
-    query_lower = query.lower()
-    for compound in compounds:
-        if (query_lower in compound['formula'].lower() or 
-            query_lower in compound['name'].lower() or
-            query_lower in compound.get('common_name', '').lower()):
-            results.append({
-                'type': 'compound',
-                'formula': compound['formula'],
-                'name': compound['name'],
-                'molecular_weight': compound.get('molecular_weight', 0),
-                'category': compound.get('category', ''),
-                'state': compound.get('state', ''),
-                'description': compound.get('description', ''),
-                'uses': compound.get('uses', []),
-                'common_name': compound.get('common_name', '')
-            })
-            if len(results) >= limit:
-                break
+    results = get_compound_store().search_keyed(query, limit, fields=('formula', 'name', 'common_name'))
     
-    return jsonify(results)
+    return json_fragments.keyed_array_response(compound_search_fragments, results)
 
 # Helper functions for formula calculations
 def parse_formula(formula):
@@ -638,6 +730,73 @@ def calculate_molecular_weight(formula, elements_data):
     
     return round(molecular_weight, 3)
 
+@cache.memoize('formula')
+def analyze_formula(formula):
+    """Molecular weight, composition and per-element breakdown of a formula"""
+    elements = load_elements()
+    molecular_weight = calculate_molecular_weight(formula, elements)
+    element_composition = parse_formula(formula)
+    
+    # Create detailed element breakdown
+    element_breakdown = []
+    element_dict = {e['symbol']: e for e in elements}
+    
+    for symbol, count in element_composition.items():
+        if symbol in element_dict:
+            element_info = element_dict[symbol]
+            element_breakdown.append({
+                'symbol': symbol,
+                'name': element_info['name'],
+                'count': count,
+                'mass': element_info['atomic_mass'] * count
+            })
+    
+    return {
+        'molecular_weight': molecular_weight,
+        'composition': element_composition,
+        'elements': element_breakdown
+    }
+
+@cache.memoize('isotopes')
+def analyze_isotopes(formula, charge, bin_width, min_abundance):
+    """Exact masses and isotopic pattern of a formula"""
+    composition = parse_formula(formula)
+    if not composition:
+        raise ValueError(f"Could not parse formula: {formula}")
+    
+    monoisotopic = isotopes.monoisotopic_mass(composition)
+    peaks = isotopes.isotope_pattern(composition, bin_width=bin_width, min_abundance=min_abundance)
+    base_peak = max(peaks, key=lambda peak: peak[2])
+    
+    return {
+        'monoisotopic_mass': round(monoisotopic, 6),
+        'average_mass': round(isotopes.average_mass(composition), 4),
+        'nominal_mass': isotopes.nominal_mass(composition),
+        'most_abundant_mass': round(base_peak[0], 6),
+        'monoisotopic_mz': round(isotopes.mass_to_charge(monoisotopic, charge), 6),
+        'peaks': [{
+            'mass': round(mass, 6),
+            'mz': round(isotopes.mass_to_charge(mass, charge), 6),
+            'probability': probability,
+            'abundance': round(relative, 4)
+        } for mass, probability, relative in peaks]
+    }
+
+@lru_cache(maxsize=None)
+def formula_mass_table(mass_type):
+    """Atomic masses used by the formula solver, by mass type"""
+    if mass_type == 'average':
+        return {e['symbol']: e['atomic_mass'] for e in load_elements()}
+    if mass_type == 'monoisotopic':
+        return {symbol: isotopes.monoisotopic_mass({symbol: 1}) for symbol in isotopes.ISOTOPES}
+    raise ValueError(f"Unknown mass type: {mass_type}")
+
+def find_known_compound(composition, tolerance=0.05):
+    """Catalog compound with exactly this composition, if any"""
+    molecular_weight = formula_solver.formula_mass(composition, formula_mass_table('average'))
+    candidates = get_compound_store().by_molecular_weight(molecular_weight - tolerance, molecular_weight + tolerance)
+    return next((c for c in candidates if parse_formula(c['formula']) == composition), None)
+
 def balance_chemical_equation(equation):
     """Simple chemical equation balancer (placeholder)"""
     # This is a simplified placeholder - real equation balancing is complex
@@ -657,14 +816,12 @@ def formula_calculator():
         return jsonify({'error': 'No formula provided'}), 400
     
     try:
-        elements = load_elements()
-        molecular_weight = calculate_molecular_weight(formula, elements)
-        element_composition = parse_formula(formula)
+        result = analyze_formula(formula)
         
         return jsonify({
             'formula': formula,
-            'molecular_weight': molecular_weight,
-            'composition': element_composition,
+            'molecular_weight': result['molecular_weight'],
+            'composition': result['composition'],
             'valid': True
         })
     except Exception as e:
@@ -683,28 +840,89 @@ def calculate_molecular_weight_api():
         return jsonify({'error': 'No formula provided'}), 400
     
     try:
-        elements = load_elements()
-        molecular_weight = calculate_molecular_weight(formula, elements)
-        element_composition = parse_formula(formula)
-        
-        # Create detailed element breakdown
-        element_breakdown = []
-        element_dict = {e['symbol']: e for e in elements}
-        
-        for symbol, count in element_composition.items():
-            if symbol in element_dict:
-                element_info = element_dict[symbol]
-                element_breakdown.append({
-                    'symbol': symbol,
-                    'name': element_info['name'],
-                    'count': count,
-                    'mass': element_info['atomic_mass'] * count
-                })
+        result = analyze_formula(formula)
         
         return jsonify({
             'formula': formula,
-            'molecular_weight': molecular_weight,
-            'elements': element_breakdown,
+            'molecular_weight': result['molecular_weight'],
+            'elements': result['elements'],
+            'valid': True
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'valid': False}), 400
+
+@app.route('/api/isotope_pattern', methods=['POST', 'GET'])
+def isotope_pattern_api():
+    """Monoisotopic mass and isotopic distribution of a formula"""
+    if request.method == 'POST':
+        data = request.get_json() or {}
+    else:  # GET request
+        data = request.args
+    formula = str(data.get('formula', '')).strip()
+    
+    if not formula:
+        return jsonify({'error': 'No formula provided'}), 400
+    
+    try:
+        charge = int(data.get('charge', 0))
+        bin_width = float(data.get('bin_width', isotopes.DEFAULT_BIN_WIDTH))
+        min_abundance = float(data.get('min_abundance', isotopes.DEFAULT_MIN_ABUNDANCE))
+        result = analyze_isotopes(formula, charge, bin_width, min_abundance)
+        
+        return jsonify(dict(result, formula=formula, charge=charge, valid=True))
+    except Exception as e:
+        return jsonify({'error': str(e), 'valid': False}), 400
+
+@app.route('/api/formula-finder/solve', methods=['POST'])
+def formula_solver_api():
+    """Candidate formulas from a target molar mass and/or percent composition"""
+    data = request.get_json() or {}
+    elements = data.get('elements') or []
+    
+    if not elements:
+        return jsonify({'error': 'No elements provided'}), 400
+    if not isinstance(elements, list) or not all(isinstance(symbol, str) for symbol in elements):
+        return jsonify({'error': 'elements must be a list of element symbols', 'valid': False}), 400
+    
+    try:
+        mass_type = data.get('mass_type', 'average')
+        masses = formula_mass_table(mass_type)
+        target_mass = data.get('target_mass')
+        time_limit_ms = min(float(data.get('time_limit_ms', formula_solver.DEFAULT_TIME_LIMIT * 1000)), 5000)
+        
+        result = formula_solver.solve(
+            masses,
+            elements,
+            target_mass=float(target_mass) if target_mass is not None else None,
+            tolerance=float(data.get('tolerance', 0.01)),
+            percentages=data.get('percentages'),
+            percent_tolerance=float(data.get('percent_tolerance', formula_solver.DEFAULT_PERCENT_TOLERANCE)),
+            min_counts=data.get('min_counts'),
+            max_counts=data.get('max_counts'),
+            max_results=min(int(data.get('max_results', formula_solver.DEFAULT_MAX_RESULTS)), 100),
+            time_limit=time_limit_ms / 1000.0,
+            require_valid_rdbe=bool(data.get('rdbe_filter', True))
+        )
+        
+        check_known = data.get('check_known', True)
+        candidates = []
+        for composition, error in result['candidates']:
+            known = find_known_compound(composition) if check_known else None
+            candidates.append({
+                'formula': formula_solver.hill_formula(composition),
+                'composition': composition,
+                'mass': round(formula_solver.formula_mass(composition, masses), 6),
+                'error': round(error, 6),
+                'rdbe': formula_solver.rdbe(composition),
+                'percentages': {s: round(p, 3) for s, p in formula_solver.mass_percentages(composition, masses).items()},
+                'known_compound': {'formula': known['formula'], 'name': known['name']} if known else None
+            })
+        
+        return jsonify({
+            'candidates': candidates,
+            'mass_type': mass_type,
+            'truncated': result['truncated'],
+            'nodes': result['nodes'],
             'valid': True
         })
     except Exception as e:
@@ -733,7 +951,7 @@ def balance_equation():
 def api_quiz_random():
     """Get random quiz questions"""
     elements = load_elements()
-    compounds = load_compounds()
+    store = get_compound_store()
     
     import random
     questions = []
@@ -752,8 +970,8 @@ def api_quiz_random():
     
     # Compound questions
     for i in range(2):
-        compound = random.choice(compounds)
-        wrong_answers = [random.choice(compounds)['formula'] for _ in range(3)]
+        compound = store.random_compound()
+        wrong_answers = [store.random_compound()['formula'] for _ in range(3)]
         questions.append({
             'type': 'compound',
             'question': f"What is the chemical formula for {compound['name']}?",
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+ChemVista static asset pipeline
+Minifies, fingerprints and precompresses CSS/JS, and serves the results with immutable caching
+
+Build once per deploy:
+
+    python assets.py
+
+This writes ``static/dist/<name>.<hash>.<ext>`` plus ``.gz`` (and ``.br`` when the
+``brotli`` package is installed) siblings and a ``manifest.json`` mapping source
+names to fingerprinted names. Templates call ``asset_url('css/style.css')``; when no
+manifest exists (e.g. in development) it falls back to the plain static URL.
+
+Note that no template links these files yet: base.html inlines its CSS/JS and uses
+CDNs, so the pipeline only affects visitors once a template calls ``asset_url``.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+
+from flask import abort, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always produced
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_FILE = os.path.join(DIST_DIR, 'manifest.json')
+
+# Source assets relative to static/
+ASSET_SOURCES = [
+    'css/style.css',
+    'css/enhanced_style.css',
+    'js/app.js',
+    'js/enhanced_app.js',
+]
+
+HASH_LENGTH = 10
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Precompressed variants in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+MIMETYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+}
+
+
+# Minification
+def minify_css(source):
+    """Strip comments and collapse whitespace in a stylesheet"""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    source = source.replace(';}', '}')
+    return source.strip()
+
+
+def minify_js(source):
+    """Conservatively minify a script: drop indentation, blank lines and line comments
+
+    Template literals are left untouched, since their whitespace is significant.
+    """
+    output = []
+    in_template = False
+    for line in source.splitlines():
+        if in_template:
+            output.append(line)
+        else:
+            stripped = line.strip()
+            if stripped and not stripped.startswith('//'):
+                output.append(stripped)
+        # Unescaped backticks toggle template-literal state
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(output) + '\n'
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+# Build stage
+def fingerprint(content):
+    """Return the content hash used in fingerprinted file names"""
+    return hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+
+
+def build_asset(relative_path, dist_dir=DIST_DIR):
+    """Minify, fingerprint and precompress one asset; return its fingerprinted name"""
+    with open(os.path.join(STATIC_DIR, relative_path), encoding='utf-8') as f:
+        source = f.read()
+
+    stem, ext = os.path.splitext(relative_path)
+    minifier = MINIFIERS.get(ext)
+    content = (minifier(source) if minifier else source).encode('utf-8')
+
+    hashed_name = f"{stem}.{fingerprint(content)}{ext}"
+    target = os.path.join(dist_dir, hashed_name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    with open(target, 'wb') as f:
+        f.write(content)
+    with open(target + '.gz', 'wb') as f:
+        # mtime=0 keeps the gzip output byte-for-byte reproducible
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(target + '.br', 'wb') as f:
+            f.write(brotli.compress(content, quality=11))
+
+    return hashed_name
+
+
+def build_assets(sources=ASSET_SOURCES, dist_dir=DIST_DIR):
+    """Build every asset and write the manifest; return the manifest dict"""
+    manifest = {path: build_asset(path, dist_dir) for path in sources}
+    os.makedirs(dist_dir, exist_ok=True)
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    load_manifest.cache_clear()
+    return manifest
+
+
+def find_unused_templates(app_source_file=os.path.join(BASE_DIR, 'app.py')):
+    """List templates that are neither rendered by the app nor extended/included"""
+    with open(app_source_file, encoding='utf-8') as f:
+        referenced = set(re.findall(r"render_template\('([^']+)'", f.read()))
+
+    templates = sorted(name for name in os.listdir(TEMPLATES_DIR) if name.endswith('.html'))
+    pending = list(referenced)
+    while pending:
+        name = pending.pop()
+        path = os.path.join(TEMPLATES_DIR, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as f:
+            for parent in re.findall(r"{%\s*(?:extends|include)\s+[\"']([^\"']+)[\"']", f.read()):
+                if parent not in referenced:
+                    referenced.add(parent)
+                    pending.append(parent)
+
+    return [name for name in templates if name not in referenced]
+
+
+# Runtime helpers
+@lru_cache(maxsize=1)
+def load_manifest():
+    """Load the asset manifest, or an empty mapping if assets have not been built"""
+    try:
+        with open(MANIFEST_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(filename):
+    """url_for-style helper returning the fingerprinted URL for a static asset"""
+    hashed_name = load_manifest().get(filename)
+    if hashed_name is None:
+        return url_for('static', filename=filename)
+    return url_for('serve_asset', filename=hashed_name)
+
+
+def serve_asset(filename):
+    """Serve a fingerprinted asset, preferring a precompressed variant"""
+    if filename not in load_manifest().values():
+        abort(404)
+
+    accepted = request.accept_encodings
+    for encoding, suffix in ENCODINGS:
+        if accepted[encoding] and os.path.exists(os.path.join(DIST_DIR, filename + suffix)):
+            response = send_from_directory(DIST_DIR, filename + suffix, conditional=False)
+            response.headers['Content-Encoding'] = encoding
+            response.headers.pop('Content-Disposition', None)
+            break
+    else:
+        response = send_from_directory(DIST_DIR, filename, conditional=False)
+
+    response.content_type = MIMETYPES.get(os.path.splitext(filename)[1], response.content_type)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def init_app(app):
+    """Register the asset route and the ``asset_url`` template helper"""
+    app.add_url_rule('/assets/<path:filename>', 'serve_asset', serve_asset)
+    app.jinja_env.globals['asset_url'] = asset_url
+
+
+if __name__ == '__main__':
+    built = build_assets()
+    for source, hashed in sorted(built.items()):
+        print(f"   {source:<30} -> dist/{hashed}")
+    if brotli is None:
+        print("ℹ️  brotli not installed; only gzip variants were written")
+
+    unused = find_unused_templates()
+    if unused:
+        print("\n📄 Templates not referenced by app.py (safe to exclude from deploys):")
+        for name in unused:
+            print(f"   {name}")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+ChemVista batch API
+Runs several API calls in one round trip
+
+    POST /api/batch
+    {"requests": [
+        {"path": "/api/element/search", "params": {"q": "carbon"}},
+        {"method": "POST", "path": "/api/calculate_molecular_weight", "body": {"formula": "H2O"}},
+        {"path": "/api/quiz/random"}
+    ]}
+
+Each sub-request is dispatched straight into the app's normal request handling
+(views, error handlers and caches included) without going through HTTP. Sub-
+requests are independent, so they run concurrently on a shared thread pool;
+results come back in request order, each with its own status code:
+
+    {"responses": [{"status": 200, "body": [...]}, ...]}
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from flask import Response, jsonify, request
+
+import json_fragments
+
+ALLOWED_METHODS = ('GET', 'POST')
+BATCH_PATH = '/api/batch'
+
+
+def _error(status, message):
+    return status, json_fragments.encode({'error': message})
+
+
+def _validate(item):
+    """Return (method, path, body) for a sub-request, or raise ValueError"""
+    if not isinstance(item, dict):
+        raise ValueError("Each request must be an object")
+    method = str(item.get('method', 'GET')).upper()
+    path = item.get('path')
+    if method not in ALLOWED_METHODS:
+        raise ValueError(f"Unsupported method: {method}")
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        raise ValueError("Path must be an /api/ endpoint")
+    if path.split('?', 1)[0].rstrip('/') == BATCH_PATH:
+        raise ValueError("Batch requests cannot be nested")
+    params = item.get('params')
+    if params is not None and not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    if params:
+        path += ('&' if '?' in path else '?') + urlencode(params, doseq=True)
+    return method, path, item.get('body')
+
+
+def _dispatch(app, method, path, body):
+    """Run one sub-request through the app; return (status, JSON-encoded body)"""
+    options = {'method': method}
+    if body is not None:
+        options['json'] = body
+    with app.test_request_context(path, **options):
+        response = app.full_dispatch_request()
+        data = response.get_data()
+        if response.is_json:
+            return response.status_code, data.strip() or b'null'
+        return response.status_code, json_fragments.encode(data.decode('utf-8', 'replace'))
+
+
+def init_app(app, max_requests=20, max_workers=4):
+    """Register POST /api/batch on the app"""
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chemvista-batch')
+
+    def run(item):
+        try:
+            method, path, body = _validate(item)
+        except ValueError as e:
+            return _error(400, str(e))
+        try:
+            return _dispatch(app, method, path, body)
+        except Exception as e:
+            app.logger.exception("Batch sub-request failed: %s %s", method, path)
+            return _error(500, str(e))
+
+    def api_batch():
+        """Run several API sub-requests concurrently and return their results in order"""
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        items = data.get('requests')
+
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'No requests provided'}), 400
+        if len(items) > max_requests:
+            return jsonify({'error': f'At most {max_requests} requests per batch'}), 400
+
+        results = list(pool.map(run, items))
+        parts = [b'{"body":%s,"status":%d}' % (body, status) for status, body in results]
+        return Response(b'{"responses":' + json_fragments.json_array(parts).rstrip() + b'}\n',
+                        mimetype='application/json')
+
+    app.add_url_rule(BATCH_PATH, 'api_batch', api_batch, methods=['POST'])
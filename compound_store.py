@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+ChemVista compound storage backends
+In-memory store for the bundled catalog, SQLite FTS5 store for million-row catalogs
+
+The SQLite store keeps one row per compound with the full record as JSON, B-tree
+indexes on formula, category and molecular weight, and an FTS5 index on name,
+common_name and description. Read connections come from a small pool, and every
+query is bounded by a LIMIT, so per-request memory stays flat however large the
+catalog is.
+
+Build a store from JSON (a list of compound objects) or JSON Lines (one object
+per line, streamed so huge exports never have to fit in memory):
+
+    python compound_store.py build data/catalog.sqlite3 pubchem_subset.jsonl
+
+With no source files, the bundled catalog from app.py is written.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS compounds (
+    id INTEGER PRIMARY KEY,
+    formula TEXT NOT NULL,
+    formula_lower TEXT NOT NULL,
+    name TEXT NOT NULL,
+    common_name TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    molecular_weight REAL NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS compounds_formula ON compounds (formula);
+CREATE INDEX IF NOT EXISTS compounds_formula_lower ON compounds (formula_lower);
+CREATE INDEX IF NOT EXISTS compounds_category ON compounds (category);
+CREATE INDEX IF NOT EXISTS compounds_molecular_weight ON compounds (molecular_weight);
+CREATE VIRTUAL TABLE IF NOT EXISTS compounds_fts USING fts5 (
+    name, common_name, description,
+    content='compounds', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Record fields that map onto FTS5 columns
+TEXT_FIELDS = ('name', 'common_name', 'description')
+
+
+class MemoryCompoundStore:
+    """Compound store over a Python list; matches by case-insensitive substring"""
+
+    def __init__(self, compounds):
+        self.compounds = compounds
+        self._by_formula = {}
+        self._by_weight = None
+        for compound in compounds:
+            self._by_formula.setdefault(compound['formula'], compound)
+
+    def version(self):
+        return hashlib.sha256(json.dumps(self.compounds, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, formula):
+        return self._by_formula.get(formula)
+
+    def search(self, query, limit=None, fields=('formula', 'name')):
+        return [compound for _, compound in self.search_keyed(query, limit, fields)]
+
+    def search_keyed(self, query, limit=None, fields=('formula', 'name')):
+        """Like search, but yields (record id, record) pairs; the id is the list index"""
+        query_lower = query.lower()
+        results = []
+        for index, compound in enumerate(self.compounds):
+            if any(query_lower in compound.get(field, '').lower() for field in fields):
+                results.append((index, compound))
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+    def by_molecular_weight(self, low, high, limit=20):
+        if self._by_weight is None:
+            self._by_weight = sorted(
+                (c.get('molecular_weight', 0) or 0, i) for i, c in enumerate(self.compounds))
+        start = bisect.bisect_left(self._by_weight, (low, -1))
+        results = []
+        for weight, index in self._by_weight[start:start + limit]:
+            if weight > high:
+                break
+            results.append(self.compounds[index])
+        return results
+
+    def iter_all(self, offset=0, limit=None):
+        end = None if limit is None else offset + limit
+        return iter(self.compounds[offset:end])
+
+    def random_compound(self):
+        return random.choice(self.compounds)
+
+
+class SQLiteCompoundStore:
+    """Read-only compound store backed by an SQLite database with FTS5"""
+
+    # Cap for callers that ask for every match (limit=None)
+    UNBOUNDED_LIMIT = 1000
+
+    # Rows fetched per round trip when streaming the full listing
+    STREAM_BATCH = 500
+
+    def __init__(self, path, pool_size=4):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Compound store not found: {path} (run: python compound_store.py build {path})")
+        self.path = path
+        self._pool = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled read connection"""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def version(self):
+        with self.connection() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else ''
+
+    def get(self, formula):
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT data FROM compounds WHERE formula = ? ORDER BY id LIMIT 1", (formula,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search(self, query, limit=None, fields=('formula', 'name')):
+        return [compound for _, compound in self.search_keyed(query, limit, fields)]
+
+    def search_keyed(self, query, limit=None, fields=('formula', 'name')):
+        """Prefix search yielding (rowid, record) pairs: formula prefix via B-tree, word prefixes via FTS5
+
+        Each index is read with its own LIMIT and the two small result sets are
+        merged here, so SQLite never materialises or sorts a full match set.
+        """
+        limit = self.UNBOUNDED_LIMIT if limit is None else min(limit, self.UNBOUNDED_LIMIT)
+        match = fts_match_expression(query, [f for f in fields if f in TEXT_FIELDS])
+        rows = {}
+        with self.connection() as conn:
+            if 'formula' in fields:
+                prefix = query.lower()
+                rows.update(conn.execute(
+                    "SELECT id, data FROM compounds WHERE formula_lower >= ? AND formula_lower < ?"
+                    " ORDER BY formula_lower LIMIT ?", (prefix, prefix + '\uffff', limit)
+                ).fetchall())
+            if match:
+                rows.update(conn.execute(
+                    "SELECT id, data FROM compounds WHERE id IN (SELECT rowid FROM compounds_fts"
+                    " WHERE compounds_fts MATCH ? ORDER BY rowid LIMIT ?)", (match, limit)
+                ).fetchall())
+        return [(key, json.loads(rows[key])) for key in sorted(rows)[:limit]]
+
+    def by_molecular_weight(self, low, high, limit=20):
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT data FROM compounds WHERE molecular_weight BETWEEN ? AND ?"
+                " ORDER BY molecular_weight LIMIT ?", (low, high, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_all(self, offset=0, limit=None):
+        """Yield records in catalog order, fetching in small keyset-paginated batches"""
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT id FROM compounds ORDER BY id LIMIT 1 OFFSET ?", (offset,)
+            ).fetchone()
+        if row is None:
+            return
+        next_id = row[0]
+        remaining = limit
+        while remaining is None or remaining > 0:
+            batch = self.STREAM_BATCH if remaining is None else min(self.STREAM_BATCH, remaining)
+            with self.connection() as conn:
+                rows = conn.execute(
+                    "SELECT id, data FROM compounds WHERE id >= ? ORDER BY id LIMIT ?", (next_id, batch)
+                ).fetchall()
+            if not rows:
+                return
+            for _, data in rows:
+                yield json.loads(data)
+            next_id = rows[-1][0] + 1
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def random_compound(self):
+        with self.connection() as conn:
+            low, high = conn.execute("SELECT MIN(id), MAX(id) FROM compounds").fetchone()
+            if low is None:
+                raise IndexError("Cannot choose from an empty compound store")
+            row = conn.execute(
+                "SELECT data FROM compounds WHERE id >= ? ORDER BY id LIMIT 1", (random.randint(low, high),)
+            ).fetchone()
+        return json.loads(row[0])
+
+
+def fts_match_expression(query, columns):
+    """Build an FTS5 MATCH expression requiring every query word as a prefix"""
+    words = re.findall(r'\w+', query)
+    if not words or not columns:
+        return None
+    terms = ' AND '.join(f'"{word}"*' for word in words)
+    return f"{{{' '.join(columns)}}} : ({terms})"
+
+
+def build_store(path, compounds, batch_size=5000):
+    """Create (or replace) an SQLite compound store from an iterable of records"""
+    if os.path.exists(path):
+        os.remove(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executescript(SCHEMA)
+
+    digest = hashlib.sha256()
+    count = 0
+    batch = []
+    for compound in compounds:
+        data = json.dumps(compound, sort_keys=True, ensure_ascii=False)
+        digest.update(data.encode('utf-8'))
+        batch.append((
+            compound['formula'],
+            compound['formula'].lower(),
+            compound['name'],
+            compound.get('common_name', ''),
+            compound.get('description', ''),
+            compound.get('category', ''),
+            compound.get('molecular_weight', 0) or 0,
+            data,
+        ))
+        if len(batch) >= batch_size:
+            count += _insert_batch(conn, batch)
+            batch = []
+    count += _insert_batch(conn, batch)
+
+    conn.execute("INSERT INTO compounds_fts (compounds_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO compounds_fts (compounds_fts) VALUES ('optimize')")
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (digest.hexdigest(),))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return count
+
+
+def _insert_batch(conn, batch):
+    conn.executemany(
+        "INSERT INTO compounds (formula, formula_lower, name, common_name, description, category,"
+        " molecular_weight, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        batch,
+    )
+    return len(batch)
+
+
+def read_compound_file(path):
+    """Yield compound records from a JSON array or a JSON Lines file"""
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def create_store(backend, compounds_loader, path=None, pool_size=4):
+    """Build the configured store; compounds_loader is only called for the memory backend"""
+    if backend == 'sqlite':
+        return SQLiteCompoundStore(path, pool_size=pool_size)
+    if backend == 'memory':
+        return MemoryCompoundStore(compounds_loader())
+    raise ValueError(f"Unknown compound store backend: {backend}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] != 'build':
+        print("Usage: python compound_store.py build OUTPUT.sqlite3 [SOURCE.json|SOURCE.jsonl ...]")
+        sys.exit(1)
+
+    output, sources = sys.argv[2], sys.argv[3:]
+    if sources:
+        records = (compound for source in sources for compound in read_compound_file(source))
+    else:
+        from app import load_compounds
+        records = iter(load_compounds())
+
+    total = build_store(output, records)
+    print(f"✅ Wrote {total} compounds to {output}")
@@ -1,5 +1,7 @@
 # ChemVista Configuration
 
+import os
+
 # Flask Application Settings
 DEBUG = True
 HOST = '0.0.0.0'
@@ -9,6 +11,9 @@ PORT = 5000
 APP_NAME = 'ChemVista'
 APP_VERSION = '1.0.0'
 APP_DESCRIPTION = 'Interactive Chemistry Explorer'
+# Build/deploy identifier folded into cache keys; when unset, a hash of the
+# app's Python sources is used instead
+DEPLOY_ID = os.environ.get('CHEMVISTA_DEPLOY_ID', '')
 
 # Data File Paths
 ELEMENTS_DATA_FILE = 'data/elements.json'
@@ -23,3 +28,25 @@ SEARCH_DEBOUNCE_MS = 300
 ELEMENTS_PER_ROW_MOBILE = 6
 ELEMENTS_PER_ROW_DESKTOP = 18
 ANIMATION_DURATION = 300
+
+# Shared Cache Settings (shared by all workers on a host)
+# Backend: 'sqlite', 'redis', 'memory' or 'none'
+SHARED_CACHE_BACKEND = os.environ.get('CHEMVISTA_CACHE_BACKEND', 'sqlite')
+# Keep this in a directory only the app user can write (e.g. a 0700 directory
+# under /dev/shm for shared memory), never directly in /tmp
+SHARED_CACHE_PATH = os.environ.get(
+    'CHEMVISTA_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'chemvista-cache.sqlite3'))
+SHARED_CACHE_MAX_BYTES = int(os.environ.get('CHEMVISTA_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+SHARED_CACHE_REDIS_URL = os.environ.get('CHEMVISTA_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+# Compound Storage Settings
+# Backend: 'memory' (bundled catalog) or 'sqlite' (FTS5 store for large catalogs,
+# built with: python compound_store.py build <path> [source.jsonl ...])
+COMPOUND_STORE_BACKEND = os.environ.get('CHEMVISTA_COMPOUND_STORE', 'memory')
+COMPOUND_STORE_PATH = os.environ.get('CHEMVISTA_COMPOUND_STORE_PATH', 'data/compounds.sqlite3')
+COMPOUND_STORE_POOL_SIZE = int(os.environ.get('CHEMVISTA_COMPOUND_STORE_POOL_SIZE', 4))
+
+# Batch API Settings
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = int(os.environ.get('CHEMVISTA_BATCH_WORKERS', 4))
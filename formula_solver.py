@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+ChemVista formula solver
+Finds candidate formulas from a target molar mass and/or mass percent composition
+
+Mass search is a branch-and-bound over element counts. Elements are visited
+heaviest first, each level only tries counts that still fit in the remaining
+mass (and within the per-element caps), and the lightest element is never
+enumerated: its count is solved directly from whatever mass is left. Percent
+search works from mole ratios: for each count of the least abundant element the
+other counts are bracketed around their ideal ratio, so only a handful of
+neighbours are ever checked. Both searches stop at a time limit and report
+whether they were truncated.
+"""
+
+import heapq
+import math
+import time
+from functools import reduce
+
+# Typical valences, used for rings-plus-double-bonds (RDBE)
+VALENCES = {
+    'H': 1, 'D': 1, 'F': 1, 'Cl': 1, 'Br': 1, 'I': 1, 'Li': 1, 'Na': 1, 'K': 1,
+    'O': 2, 'S': 2, 'Se': 2, 'Mg': 2, 'Ca': 2,
+    'B': 3, 'N': 3, 'P': 3, 'Al': 3,
+    'C': 4, 'Si': 4,
+}
+
+DEFAULT_MAX_RESULTS = 20
+DEFAULT_TIME_LIMIT = 0.5  # seconds
+DEFAULT_PERCENT_TOLERANCE = 0.3  # percentage points
+
+# Upper bound on the count of the least abundant element when no target mass
+# bounds the percent search
+MAX_EMPIRICAL_COUNT = 60
+
+# Nodes visited between deadline checks
+CHECK_INTERVAL = 2048
+
+
+class SearchTimeout(Exception):
+    """Raised internally when a search runs past its deadline"""
+
+
+def hill_formula(composition):
+    """Format a composition in Hill order (C, H, then alphabetical)"""
+    symbols = sorted(s for s, n in composition.items() if n > 0)
+    if 'C' in symbols:
+        symbols = ['C'] + (['H'] if 'H' in symbols else []) + [s for s in symbols if s not in ('C', 'H')]
+    return ''.join(s + (str(composition[s]) if composition[s] > 1 else '') for s in symbols)
+
+
+def formula_mass(composition, masses):
+    return sum(masses[s] * n for s, n in composition.items())
+
+
+def rdbe(composition):
+    """Rings plus double bonds, or None if an element has no typical valence"""
+    if any(s not in VALENCES for s in composition):
+        return None
+    return 1 + sum(n * (VALENCES[s] - 2) for s, n in composition.items()) / 2
+
+
+def mass_percentages(composition, masses):
+    total = formula_mass(composition, masses)
+    return {s: 100.0 * masses[s] * n / total for s, n in composition.items()}
+
+
+def _valid_rdbe(composition):
+    """Non-negative whole RDBE, i.e. a plausible neutral even-electron molecule"""
+    value = rdbe(composition)
+    return value is None or (value >= 0 and float(value).is_integer())
+
+
+class _Collector:
+    """Keeps the best candidates by error and enforces the deadline"""
+
+    def __init__(self, max_results, deadline, require_rdbe, smallest_first=False):
+        self.max_results = max_results
+        self.deadline = deadline
+        self.require_rdbe = require_rdbe
+        self.smallest_first = smallest_first
+        self.nodes = 0
+        self._heap = []
+        self._seen = set()
+
+    def tick(self):
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+    def add(self, composition, error):
+        composition = {s: n for s, n in composition.items() if n > 0}
+        if not composition:
+            return
+        key = tuple(sorted(composition.items()))
+        if key in self._seen:
+            return
+        if self.require_rdbe and not _valid_rdbe(composition):
+            return
+        self._seen.add(key)
+        # Min-heap on negated rank, so the worst kept candidate is dropped first
+        rank = (abs(error), sum(composition.values()))
+        if self.smallest_first:
+            rank = rank[::-1]
+        entry = (-rank[0], -rank[1], key, abs(error))
+        if len(self._heap) < self.max_results:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def results(self):
+        """(composition, absolute error) pairs, best first"""
+        return [(dict(key), error) for _, _, key, error in sorted(self._heap, reverse=True)]
+
+
+def _search_mass(symbols, masses, target, tolerance, min_counts, max_counts, collector):
+    """Branch-and-bound enumeration of compositions within tolerance of target"""
+    order = sorted(symbols, key=lambda s: masses[s], reverse=True)
+    last = order[-1]
+    counts = {}
+
+    # Most mass the elements after each level can still contribute (None if unbounded)
+    capacity = [0.0] * (len(order) + 1)
+    for i in range(len(order) - 1, -1, -1):
+        cap = max_counts.get(order[i])
+        capacity[i] = None if cap is None or capacity[i + 1] is None else capacity[i + 1] + cap * masses[order[i]]
+
+    def visit(level, remaining):
+        collector.tick()
+        symbol = order[level]
+        mass = masses[symbol]
+        low = min_counts.get(symbol, 0)
+        high = max_counts.get(symbol)
+
+        if symbol == last:
+            # Solve the lightest element's count directly
+            ideal = remaining / mass
+            for n in {math.floor(ideal), math.ceil(ideal)}:
+                if n >= low and (high is None or n <= high) and abs(remaining - n * mass) <= tolerance:
+                    counts[symbol] = n
+                    collector.add(counts, remaining - n * mass)
+            counts.pop(symbol, None)
+            return
+
+        top = math.floor((remaining + tolerance) / mass)
+        if high is not None:
+            top = min(top, high)
+        for n in range(top, low - 1, -1):
+            left = remaining - n * mass
+            rest = capacity[level + 1]
+            if rest is not None and left > rest + tolerance:
+                break  # Fewer of this element only leaves more to fill
+            counts[symbol] = n
+            visit(level + 1, left)
+        counts.pop(symbol, None)
+
+    reserved = sum(min_counts.get(s, 0) * masses[s] for s in order)
+    if reserved <= target + tolerance:
+        visit(0, target)
+
+
+def _search_percentages(symbols, masses, percentages, percent_tolerance, target, tolerance,
+                        max_counts, collector):
+    """Candidates whose mass percentages all lie within percent_tolerance"""
+    ratios = {s: percentages[s] / masses[s] for s in symbols}
+    present = [s for s in symbols if ratios[s] > 0]
+    if not present:
+        return
+    reference = min(present, key=lambda s: ratios[s])
+    others = [s for s in present if s != reference]
+
+    if target is not None:
+        top = math.ceil((target + tolerance) * percentages[reference] / 100.0 / masses[reference]) + 1
+    else:
+        top = MAX_EMPIRICAL_COUNT
+
+    def visit(index, counts):
+        collector.tick()
+        if index == len(others):
+            computed = mass_percentages(counts, masses)
+            error = max(abs(computed[s] - percentages[s]) for s in present)
+            if error > percent_tolerance:
+                return
+            if target is not None:
+                if abs(formula_mass(counts, masses) - target) > tolerance:
+                    return
+            elif reduce(math.gcd, counts.values()) != 1:
+                return  # Without a target mass, report empirical formulas only
+            collector.add(counts, error)
+            return
+        symbol = others[index]
+        ideal = counts[reference] * ratios[symbol] / ratios[reference]
+        for n in {max(1, math.floor(ideal)), max(1, math.ceil(ideal))}:
+            if max_counts.get(symbol) is not None and n > max_counts[symbol]:
+                continue
+            counts[symbol] = n
+            visit(index + 1, counts)
+        counts.pop(symbol, None)
+
+    if max_counts.get(reference) is not None:
+        top = min(top, max_counts[reference])
+    for k in range(1, top + 1):
+        visit(0, {reference: k})
+
+
+def solve(masses, elements, target_mass=None, tolerance=0.01, percentages=None,
+          percent_tolerance=DEFAULT_PERCENT_TOLERANCE, min_counts=None, max_counts=None,
+          max_results=DEFAULT_MAX_RESULTS, time_limit=DEFAULT_TIME_LIMIT, require_valid_rdbe=True):
+    """Enumerate candidate formulas ranked by error
+
+    masses maps element symbols to the atomic masses to use. Give a target mass
+    (with an absolute tolerance in u), mass percentages, or both. With
+    percentages, an element listed in `elements` but missing from them takes
+    the remainder up to 100%.
+
+    Returns a dict with ranked `candidates` as (composition, error) pairs, where
+    error is in u for mass searches and in percentage points for percent
+    searches, `truncated` if the time limit was reached, and the number of
+    search `nodes` visited.
+    """
+    elements = list(dict.fromkeys(elements))
+    if not elements:
+        raise ValueError("At least one element is required")
+    unknown = [s for s in elements if s not in masses]
+    if unknown:
+        raise ValueError(f"Unknown element: {unknown[0]}")
+    if target_mass is None and not percentages:
+        raise ValueError("Provide a target mass, mass percentages, or both")
+    if target_mass is not None and target_mass <= 0:
+        raise ValueError("Target mass must be positive")
+    if tolerance < 0 or percent_tolerance < 0:
+        raise ValueError("Tolerances cannot be negative")
+    if max_results < 1:
+        raise ValueError("max_results must be at least 1")
+
+    # Empirical formulas are ratios, not molecules, so RDBE only applies with a target mass
+    empirical = bool(percentages) and target_mass is None
+    collector = _Collector(max_results, time.perf_counter() + time_limit,
+                           require_valid_rdbe and not empirical, smallest_first=empirical)
+    truncated = False
+    try:
+        if percentages:
+            percentages = _complete_percentages(elements, percentages)
+            _search_percentages(elements, masses, percentages, percent_tolerance,
+                                target_mass, tolerance, max_counts or {}, collector)
+        else:
+            _search_mass(elements, masses, target_mass, tolerance,
+                         min_counts or {}, max_counts or {}, collector)
+    except SearchTimeout:
+        truncated = True
+
+    candidates = collector.results()
+    if empirical:
+        candidates = _simplest_first(candidates)
+    return {'candidates': candidates, 'truncated': truncated, 'nodes': collector.nodes}
+
+
+def _simplest_first(candidates):
+    """Drop candidates that fit no better than a smaller formula, smallest first
+
+    Large empirical formulas can always approximate a ratio a little more
+    closely; they are only worth reporting when they beat every simpler one.
+    """
+    kept = []
+    best_error = math.inf
+    for composition, error in sorted(candidates, key=lambda c: (sum(c[0].values()), c[1])):
+        if error < best_error:
+            kept.append((composition, error))
+            best_error = error
+    return sorted(kept, key=lambda c: (c[1], sum(c[0].values())))
+
+
+def _complete_percentages(elements, percentages):
+    extra = [s for s in percentages if s not in elements]
+    if extra:
+        raise ValueError(f"Percentage given for element not in the element set: {extra[0]}")
+    completed = {s: float(percentages.get(s, 0)) for s in elements}
+    missing = [s for s in elements if s not in percentages]
+    if len(missing) == 1:
+        completed[missing[0]] = max(0.0, 100.0 - sum(completed.values()))
+    elif missing:
+        raise ValueError("Give percentages for all elements, or leave out exactly one to take the remainder")
+    return completed
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+ChemVista pre-encoded JSON fragments
+Encodes each record's API projection to UTF-8 JSON bytes once and reuses it
+
+Search endpoints return lists of small, fixed projections of catalog records.
+Instead of building a fresh dict per hit and re-encoding it on every request,
+each projection is encoded the first time a record is returned and the bytes
+are kept for the life of the process (the catalog is immutable per process, so
+this is once per catalog version). Responses are assembled by joining the
+cached fragments.
+
+Encoding matches Flask's default JSON provider (sorted keys, ASCII-escaped)
+in its compact form.
+"""
+
+import json
+
+from flask import Response
+
+# Fragments kept per encoder before the table is reset; only reached with
+# large SQLite-backed catalogs, where hits are a small working set
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+def encode(obj):
+    """Encode a value the way the API's JSON responses do"""
+    return json.dumps(obj, separators=(',', ':'), sort_keys=True, ensure_ascii=True).encode('utf-8')
+
+
+class FragmentEncoder:
+    """Caches the encoded projection of each record, keyed by a unique record key
+
+    The key is taken from key(record), or passed in by callers whose records
+    carry no unique field (e.g. a compound store's record id).
+    """
+
+    def __init__(self, projection, key=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.projection = projection
+        self.key = key
+        self.max_entries = max_entries
+        self._fragments = {}
+
+    def encode(self, record, key=None):
+        if key is None:
+            key = self.key(record)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = encode(self.projection(record))
+            if len(self._fragments) >= self.max_entries:
+                self._fragments = {}
+            self._fragments[key] = fragment
+        return fragment
+
+
+def json_array(fragments):
+    """Join pre-encoded fragments into a JSON array"""
+    return b'[' + b','.join(fragments) + b']\n'
+
+
+def array_response(encoder, records):
+    """JSON array response of the records' pre-encoded projections"""
+    return Response(json_array([encoder.encode(record) for record in records]),
+                    mimetype='application/json')
+
+
+def keyed_array_response(encoder, items):
+    """JSON array response of pre-encoded projections for (key, record) pairs"""
+    return Response(json_array([encoder.encode(record, key) for key, record in items]),
+                    mimetype='application/json')
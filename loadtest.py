@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+ChemVista load generator
+Replays a realistic traffic mix against the Flask app (in-process) or a served instance
+
+    python loadtest.py                              # in-process, default workload
+    python loadtest.py --url http://localhost:5000  # against a running server
+    python loadtest.py --workload workload.json --json report.json
+
+Sessions arrive as a Poisson process at ``arrival_rate`` per second and are run on a
+pool of ``concurrency`` threads. Each session is one user action: typing a search
+term into autocomplete, opening a detail page, fetching a burst of quiz questions or
+submitting a formula to the calculator. Latency is measured from the moment a request
+was *due* to be sent, so time spent waiting for a free worker counts against the
+server (no coordinated omission).
+
+A workload file overrides any of the keys in DEFAULT_WORKLOAD, e.g.
+
+    {"duration": 60, "arrival_rate": 50, "mix": {"autocomplete": 70, "calculator": 30}}
+"""
+
+import argparse
+import heapq
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlparse
+
+import config
+
+DEFAULT_WORKLOAD = {
+    'duration': 20,          # seconds of arrivals
+    'arrival_rate': 20,      # sessions per second
+    'concurrency': 16,       # client threads
+    'seed': None,
+    # Relative weights of session types; autocomplete sessions issue several
+    # requests each, so together these give roughly 60% /api/search traffic
+    'mix': {
+        'autocomplete': 45,
+        'element_detail': 20,
+        'compound_detail': 15,
+        'quiz_burst': 5,
+        'calculator': 15,
+    },
+    'autocomplete': {
+        'keystroke_ms': 180,                       # mean gap between keystrokes
+        'debounce_ms': config.SEARCH_DEBOUNCE_MS,  # client waits this long before querying
+        'min_length': config.MIN_SEARCH_LENGTH,
+        'limit': 10,
+    },
+    'quiz_burst': {
+        'size': 5,
+        'gap_ms': 50,
+    },
+    # Optional fixed vocabulary; by default compound names/formulas are fetched
+    # from the target's /api/compounds
+    'terms': None,
+    'formulas': None,
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+# Targets
+class FlaskTarget:
+    """Sends requests through Flask's test client, without a network hop"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        data = response.get_data()
+        return response.status_code, data
+
+
+class HttpTarget:
+    """Sends requests to a served instance over keep-alive HTTP connections"""
+
+    def __init__(self, base_url, timeout=30.0):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.https = parsed.scheme == 'https'
+        self.prefix = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method, path, body=None):
+        headers = {'Accept-Encoding': 'identity'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        conn = self._connection()
+        try:
+            conn.request(method, self.prefix + path, body=payload, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+# Session builders: each returns [(think_seconds, endpoint, method, path, body), ...]
+def autocomplete_session(rng, workload, vocab):
+    """Type a term key by key; query whenever the typist pauses past the debounce"""
+    settings = workload['autocomplete']
+    term = rng.choice(vocab['terms'])
+    keystroke = settings['keystroke_ms'] / 1000.0
+    debounce = settings['debounce_ms'] / 1000.0
+
+    steps = []
+    waited = 0.0
+    for length in range(1, len(term) + 1):
+        gap = rng.expovariate(1.0 / keystroke) if length < len(term) else debounce
+        waited += gap
+        if length >= settings['min_length'] and gap >= debounce:
+            path = f"/api/search?q={quote(term[:length])}&limit={settings['limit']}"
+            steps.append((waited, 'autocomplete', 'GET', path, None))
+            waited = 0.0
+    return steps
+
+
+def element_detail_session(rng, workload, vocab):
+    return [(0.0, 'element_detail', 'GET', f"/element/{rng.randint(1, 118)}", None)]
+
+
+def compound_detail_session(rng, workload, vocab):
+    formula = rng.choice(vocab['formulas'])
+    return [(0.0, 'compound_detail', 'GET', f"/compound/{quote(formula)}", None)]
+
+
+def quiz_burst_session(rng, workload, vocab):
+    settings = workload['quiz_burst']
+    gap = settings['gap_ms'] / 1000.0
+    return [(gap if i else 0.0, 'quiz_random', 'GET', '/api/quiz/random', None)
+            for i in range(settings['size'])]
+
+
+def calculator_session(rng, workload, vocab):
+    formula = rng.choice(vocab['formulas'])
+    return [(0.0, 'calculator', 'POST', '/api/calculate_molecular_weight', {'formula': formula})]
+
+
+SESSIONS = {
+    'autocomplete': autocomplete_session,
+    'element_detail': element_detail_session,
+    'compound_detail': compound_detail_session,
+    'quiz_burst': quiz_burst_session,
+    'calculator': calculator_session,
+}
+
+
+# Runner
+class Recorder:
+    """Thread-safe collection of per-endpoint latencies and outcomes"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.client_errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency, status):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if status is None or status >= 500:
+                self.errors[endpoint] += 1
+            elif status >= 400:
+                self.client_errors[endpoint] += 1
+
+
+def load_vocabulary(target, workload):
+    """Search terms and formulas to draw from, fetched from the target if not given"""
+    terms = workload.get('terms')
+    formulas = workload.get('formulas')
+    if not terms or not formulas:
+        status, data = target.request('GET', '/api/compounds?limit=1000')
+        if status != 200:
+            raise RuntimeError(f"Could not fetch compounds for the workload vocabulary (HTTP {status})")
+        compounds = json.loads(data)
+        terms = terms or [c['name'].lower() for c in compounds] + [c['formula'] for c in compounds]
+        formulas = formulas or [c['formula'] for c in compounds]
+    return {'terms': terms, 'formulas': formulas}
+
+
+class Scheduler:
+    """Dispatches session steps to the thread pool when they fall due
+
+    Think time between steps is spent in the schedule rather than on a worker
+    thread, so slow typists never tie up client capacity.
+    """
+
+    def __init__(self, target, pool, recorder):
+        self.target = target
+        self.pool = pool
+        self.recorder = recorder
+        self._pending = []
+        self._sequence = 0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def add(self, steps, due):
+        if steps:
+            with self._cond:
+                self._push(steps, 0, due + steps[0][0])
+
+    def _push(self, steps, index, due):
+        heapq.heappush(self._pending, (due, self._sequence, steps, index))
+        self._sequence += 1
+        self._cond.notify()
+
+    def dispatch_until(self, deadline=None):
+        """Send due steps until the deadline, or until all sessions finish if None"""
+        with self._cond:
+            while True:
+                now = time.perf_counter()
+                if deadline is not None and now >= deadline:
+                    return
+                if deadline is None and not self._pending and not self._in_flight:
+                    return
+                if self._pending and self._pending[0][0] <= now:
+                    due, _, steps, index = heapq.heappop(self._pending)
+                    self._in_flight += 1
+                    self.pool.submit(self._send, steps, index, due)
+                    continue
+                wake = self._pending[0][0] if self._pending else None
+                if deadline is not None:
+                    wake = deadline if wake is None else min(wake, deadline)
+                self._cond.wait(None if wake is None else max(0.0, wake - now))
+
+    def _send(self, steps, index, due):
+        _, endpoint, method, path, body = steps[index]
+        try:
+            status, _ = self.target.request(method, path, body)
+        except Exception:
+            status = None
+        finished = time.perf_counter()
+        self.recorder.record(endpoint, finished - due, status)
+        with self._cond:
+            self._in_flight -= 1
+            if index + 1 < len(steps):
+                # Think time for the next step starts once this response arrives
+                self._push(steps, index + 1, finished + steps[index + 1][0])
+            self._cond.notify()
+
+
+def run_workload(target, workload):
+    """Drive the target with the workload; return a report dict"""
+    rng = random.Random(workload.get('seed'))
+    vocab = load_vocabulary(target, workload)
+    names = [name for name, weight in workload['mix'].items() if weight > 0]
+    weights = [workload['mix'][name] for name in names]
+    unknown = set(names) - set(SESSIONS)
+    if unknown:
+        raise ValueError(f"Unknown session types in mix: {', '.join(sorted(unknown))}")
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    deadline = started + workload['duration']
+    with ThreadPoolExecutor(max_workers=workload['concurrency']) as pool:
+        scheduler = Scheduler(target, pool, recorder)
+        due = started
+        while True:
+            due += rng.expovariate(workload['arrival_rate'])
+            if due >= deadline:
+                break
+            steps = SESSIONS[rng.choices(names, weights)[0]](rng, workload, vocab)
+            scheduler.dispatch_until(due)
+            scheduler.add(steps, due)
+        scheduler.dispatch_until(None)
+    elapsed = time.perf_counter() - started
+
+    return build_report(recorder, elapsed)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, client_errors, elapsed):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    summary = {
+        'requests': count,
+        'throughput_rps': round(count / elapsed, 2) if elapsed else 0.0,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'client_errors': client_errors,
+        'mean_ms': round(1000 * sum(latencies) / count, 2) if count else 0.0,
+        'max_ms': round(1000 * latencies[-1], 2) if count else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f'p{pct}_ms'] = round(1000 * percentile(latencies, pct), 2)
+    return summary
+
+
+def build_report(recorder, elapsed):
+    endpoints = {
+        name: summarize(values, recorder.errors[name], recorder.client_errors[name], elapsed)
+        for name, values in sorted(recorder.latencies.items())
+    }
+    all_latencies = [value for values in recorder.latencies.values() for value in values]
+    total = summarize(all_latencies, sum(recorder.errors.values()),
+                      sum(recorder.client_errors.values()), elapsed)
+    for summary in endpoints.values():
+        summary['share'] = round(summary['requests'] / total['requests'], 3) if total['requests'] else 0.0
+    return {'elapsed_s': round(elapsed, 2), 'endpoints': endpoints, 'total': total}
+
+
+def print_report(report):
+    columns = ['requests', 'share', 'throughput_rps', 'error_rate', 'mean_ms'] + \
+              [f'p{pct}_ms' for pct in PERCENTILES] + ['max_ms']
+    labels = {'throughput_rps': 'req/s', 'error_rate': 'errors'}
+    header = f"{'endpoint':<18}" + ''.join(f"{labels.get(c, c.replace('_ms', '')):>10}" for c in columns)
+    print(header)
+    print('-' * len(header))
+    rows = list(report['endpoints'].items()) + [('TOTAL', dict(report['total'], share=1.0))]
+    for name, summary in rows:
+        print(f"{name:<18}" + ''.join(f"{summary[c]:>10}" for c in columns))
+    print(f"\nLatencies in ms over {report['elapsed_s']}s; 4xx responses: {report['total']['client_errors']}")
+
+
+def load_workload(path=None, overrides=None):
+    """Merge a workload file and command-line overrides into the defaults"""
+    workload = json.loads(json.dumps(DEFAULT_WORKLOAD))
+    sources = []
+    if path:
+        with open(path, encoding='utf-8') as f:
+            sources.append(json.load(f))
+    sources.append({k: v for k, v in (overrides or {}).items() if v is not None})
+    for source in sources:
+        for key, value in source.items():
+            if isinstance(value, dict) and isinstance(workload.get(key), dict) and key != 'mix':
+                workload[key].update(value)
+            else:
+                workload[key] = value
+    return workload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a ChemVista traffic mix and report latencies")
+    parser.add_argument('--url', help="Base URL of a running instance (default: in-process app)")
+    parser.add_argument('--workload', help="JSON workload definition")
+    parser.add_argument('--duration', type=float, help="Seconds of arrivals")
+    parser.add_argument('--rate', type=float, dest='arrival_rate', help="Sessions per second")
+    parser.add_argument('--concurrency', type=int, help="Client threads")
+    parser.add_argument('--seed', type=int, help="Random seed for a repeatable run")
+    parser.add_argument('--json', dest='json_path', help="Also write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    workload = load_workload(args.workload, {
+        'duration': args.duration,
+        'arrival_rate': args.arrival_rate,
+        'concurrency': args.concurrency,
+        'seed': args.seed,
+    })
+
+    if args.url:
+        target = HttpTarget(args.url)
+    else:
+        from app import app
+        target = FlaskTarget(app)
+
+    print(f"🧪 {workload['arrival_rate']} sessions/s for {workload['duration']}s "
+          f"on {workload['concurrency']} threads against {args.url or 'in-process app'}\n")
+    report = run_workload(target, workload)
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['total']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+ChemVista shared result cache
+Pluggable cache backends shared by every WSGI worker on a host
+
+Backends:
+    sqlite  - a single SQLite file (WAL mode) shared by all workers; point it at a
+              private directory under /dev/shm to keep it in shared memory.
+              Size-bounded, least recently used entries are evicted first.
+    redis   - any local server speaking the Redis protocol (Redis, KeyDB, Valkey,
+              Dragonfly). Eviction is left to the server's maxmemory policy.
+    memory  - per-process LRU, for development and single-worker setups.
+    none    - caching disabled.
+
+Keys are namespaced and prefixed with a version string (the catalog version), so a
+data or template change makes every old entry unreachable; stale rows are then
+evicted by the size bound.
+
+Values are stored as JSON, never pickled: whoever can write to the cache file or
+server can at worst poison cached content, not run code in the app.
+"""
+
+import base64
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import unquote, urlparse
+
+from flask import make_response, request
+
+
+class CacheBackend:
+    """Byte-oriented key/value store interface"""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Backend that stores nothing"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU bounded by total value size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class SQLiteCache(CacheBackend):
+    """Cache stored in one SQLite file, shared across processes"""
+
+    # Only refresh an entry's access time when it is older than this, so hot
+    # reads do not turn into writes
+    TOUCH_INTERVAL = 30.0
+
+    # Fraction of max_bytes to free when the bound is exceeded, so eviction
+    # runs in batches instead of on every insert
+    EVICT_HEADROOM = 0.1
+
+    # The byte total in cache_size is kept by triggers, so writes never have to
+    # SUM the table. Created in one transaction so no worker sees it half-built.
+    SCHEMA = """
+    BEGIN IMMEDIATE;
+    CREATE TABLE IF NOT EXISTS cache (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        accessed REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+    CREATE TABLE IF NOT EXISTS cache_size (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        total INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO cache_size (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM cache;
+    CREATE TRIGGER IF NOT EXISTS cache_size_insert AFTER INSERT ON cache
+        BEGIN UPDATE cache_size SET total = total + NEW.size; END;
+    CREATE TRIGGER IF NOT EXISTS cache_size_update AFTER UPDATE OF size ON cache
+        BEGIN UPDATE cache_size SET total = total - OLD.size + NEW.size; END;
+    CREATE TRIGGER IF NOT EXISTS cache_size_delete AFTER DELETE ON cache
+        BEGIN UPDATE cache_size SET total = total - OLD.size; END;
+    COMMIT;
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute("SELECT value, accessed FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > self.TOUCH_INTERVAL:
+            try:
+                conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            except sqlite3.OperationalError:
+                pass  # Another worker holds the write lock; the touch can wait
+        return row[0]
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        conn = self._connection()
+        try:
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete
+            # skips the delete trigger and would leave the byte total too high
+            conn.execute(
+                "INSERT INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size,"
+                " accessed = excluded.accessed",
+                (key, sqlite3.Binary(value), len(value), time.time()),
+            )
+            self._evict(conn)
+        except sqlite3.OperationalError:
+            pass  # Cache writes are best effort under lock contention
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT total FROM cache_size").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - self.max_bytes * (1 - self.EVICT_HEADROOM)
+        freed = 0
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed"):
+            doomed.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache")
+
+
+class RedisCache(CacheBackend):
+    """Minimal Redis-protocol (RESP) client for a local cache server"""
+
+    def __init__(self, url, ttl=None):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password is not None else None
+        self.ttl = ttl
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=2.0)
+            conn = (sock, sock.makefile('rb'))
+            self._local.conn = conn
+            try:
+                if self.password is not None:
+                    self._command('AUTH', *([self.username] if self.username else []), self.password)
+                if self.db:
+                    self._command('SELECT', str(self.db))
+            except (OSError, RuntimeError):
+                self._local.conn = None
+                raise
+        return conn
+
+    def _command(self, *args):
+        sock, reader = self._connection()
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        try:
+            sock.sendall(b''.join(parts))
+            return self._read_reply(reader)
+        except (OSError, RuntimeError):
+            # Start the next command on a fresh connection, in case this one is out of step
+            self._local.conn = None
+            sock.close()
+            raise
+
+    @staticmethod
+    def _read_reply(reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Cache server closed the connection")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload
+        if kind == b'-':
+            raise RuntimeError(payload.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        raise RuntimeError(f"Unsupported reply type: {kind!r}")
+
+    def get(self, key):
+        try:
+            return self._command('GET', key)
+        except (OSError, RuntimeError):
+            return None  # Unreachable server or an error reply (NOAUTH, READONLY, ...): a miss
+
+    def set(self, key, value):
+        args = ['SET', key, value]
+        if self.ttl:
+            args += ['EX', str(int(self.ttl))]
+        try:
+            self._command(*args)
+        except (OSError, RuntimeError):
+            pass  # e.g. OOM under noeviction; cache writes are best effort
+
+    def clear(self):
+        self._command('FLUSHDB')
+
+
+class SharedCache:
+    """Versioned, namespaced cache on top of a backend"""
+
+    def __init__(self, backend, version=''):
+        self.backend = backend
+        self.version = version
+
+    def key(self, namespace, *parts):
+        return '|'.join([self.version, namespace] + [str(p) for p in parts])
+
+    def get(self, namespace, *parts):
+        data = self.backend.get(self.key(namespace, *parts))
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None  # Not ours (e.g. written by an older release); treat as a miss
+
+    def set(self, namespace, value, *parts):
+        """Store a JSON-serialisable value; tuples come back as lists"""
+        data = json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        self.backend.set(self.key(namespace, *parts), data)
+
+    def memoize(self, namespace):
+        """Cache a pure function's return value by its positional arguments"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args):
+                cached = self.get(namespace, *args)
+                if cached is not None:
+                    return cached
+                result = func(*args)
+                self.set(namespace, result, *args)
+                return result
+            return wrapper
+        return decorator
+
+    def cached_view(self, namespace):
+        """Cache successful GET responses of a Flask view by full request path"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET':
+                    return view(*args, **kwargs)
+                cached = self.get(namespace, request.full_path)
+                if cached is not None:
+                    response = make_response(base64.b64decode(cached['body']), cached['status'])
+                    response.mimetype = cached['mimetype']
+                    return response
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not (response.is_streamed or response.direct_passthrough):
+                    self.set(namespace, {
+                        'body': base64.b64encode(response.get_data()).decode('ascii'),
+                        'status': response.status_code,
+                        'mimetype': response.mimetype,
+                    }, request.full_path)
+                return response
+            return wrapper
+        return decorator
+
+
+def create_backend(name, path=None, max_bytes=64 * 1024 * 1024, redis_url=None, ttl=None):
+    """Build a cache backend from its configured name"""
+    if name == 'sqlite':
+        return SQLiteCache(path, max_bytes)
+    if name == 'redis':
+        return RedisCache(redis_url or 'redis://localhost:6379/0', ttl=ttl)
+    if name == 'memory':
+        return MemoryCache(max_bytes)
+    if name in ('none', '', None):
+        return NullCache()
+    raise ValueError(f"Unknown cache backend: {name}")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+ChemVista regression tests
+Run with:  python -m pytest -q test_app.py
+"""
+
+import os
+
+# Keep tests independent of any shared cache on the machine
+os.environ['CHEMVISTA_CACHE_BACKEND'] = 'none'
+
+import pytest
+
+import formula_solver
+import isotopes
+from app import app, formula_mass_table
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+# Isotope engine
+
+def test_glucose_isotope_pattern(client):
+    response = client.get('/api/isotope_pattern?formula=C6H12O6')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['monoisotopic_mass'] == pytest.approx(180.063388, abs=1e-6)
+    assert data['nominal_mass'] == 180
+    abundances = [peak['abundance'] for peak in data['peaks']]
+    assert abundances[0] == pytest.approx(100.0)
+    assert abundances[1] == pytest.approx(6.856, abs=0.01)  # M+1
+    assert abundances[2] == pytest.approx(1.433, abs=0.01)  # M+2
+
+
+def test_isotope_pattern_rejects_too_many_atoms(client):
+    response = client.get('/api/isotope_pattern?formula=C1000000000H2000000000')
+    assert response.status_code == 400
+    assert str(isotopes.MAX_ATOMS) in response.get_json()['error']
+
+
+def test_isotope_pattern_rejects_narrow_bins(client):
+    response = client.get('/api/isotope_pattern?formula=C6H12O6&bin_width=0.00001')
+    assert response.status_code == 400
+    assert 'bin_width' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('value', ['101', 'nan', '-1'])
+def test_isotope_pattern_rejects_bad_min_abundance(client, value):
+    response = client.get(f'/api/isotope_pattern?formula=C6H12O6&min_abundance={value}')
+    assert response.status_code == 400
+    assert 'min_abundance' in response.get_json()['error']
+
+
+# Formula solver
+
+def solve(client, **payload):
+    response = client.post('/api/formula-finder/solve', json=payload)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_solver_finds_ethanol_by_mass(client):
+    data = solve(client, elements=['C', 'H', 'O'], target_mass=46.07, tolerance=0.01)
+    formulas = [candidate['formula'] for candidate in data['candidates']]
+    assert 'C2H6O' in formulas
+    ethanol = data['candidates'][formulas.index('C2H6O')]
+    assert ethanol['known_compound']['name'] == 'Ethanol'
+
+
+def test_solver_finds_sodium_chloride_by_percent(client):
+    data = solve(client, elements=['Na', 'Cl'], percentages={'Na': 39.34})
+    assert data['candidates'][0]['formula'] == 'ClNa'
+    assert data['candidates'][0]['composition'] == {'Na': 1, 'Cl': 1}
+
+
+def test_solver_reports_truncation():
+    result = formula_solver.solve(
+        formula_mass_table('average'), ['C', 'H', 'N', 'O', 'S', 'P'],
+        target_mass=5000, tolerance=0.5, time_limit=0.001)
+    assert result['truncated']
+
+
+@pytest.mark.parametrize('payload', [
+    {'elements': 'CHNaO', 'target_mass': 46.07},
+    {'elements': ['C', 'H', 'O'], 'target_mass': 46.07, 'max_results': 0},
+])
+def test_solver_rejects_bad_input(client, payload):
+    response = client.post('/api/formula-finder/solve', json=payload)
+    assert response.status_code == 400
+    assert response.get_json()['valid'] is False